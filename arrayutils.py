@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+arrayutils.py
+
+This module provides helpers shared by the property kernels that accept floats and numpy arrays.
+
+Created on 2026-10-16 09:12:41
+"""
+
+import numpy as np
+
+
+def any_true(condition: bool | np.ndarray) -> bool:
+    """True if a scalar condition holds or any element of an array condition holds"""
+    if isinstance(condition, np.ndarray):
+        return bool(condition.any())
+    return condition
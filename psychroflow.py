@@ -11,48 +11,68 @@ Created on 2024-01-02 07:09:48
 @author: orc
 """
 
-# from logging import warning
+from functools import lru_cache
 from math import isclose
 
 from typing import Self
 from dataclasses import dataclass, field
-from scipy import optimize
+import numpy as np
 
 from psychrostate import (
     HumidAirState,
+    HumidAirStateBatch,
     get_t_dry_bulb_from_tot_enthalpy_air_water_mix,
     get_sat_hum_ratio,
+    get_moist_air_enthalpy,
+    get_moist_air_volume,
+    get_t_dry_bulb_from_moist_air_enthalpy,
+    get_vap_pres_hum_ratio_from_rel_hum,
+    solve_brentq,
     STANDARD_PRESSURE,
 )
 from waterstate import WaterState
 
+# dry air at the reference point of DIN 1343, 0 °C and 101325 Pa
+_HAS_DIN1343_DRY = HumidAirState.from_t_dry_bulb_rel_hum(
+    t_dry_bulb=0,
+    rel_hum=0,
+    pressure=101325,
+)
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class WaterFlow:
     """A flow of liquid water"""
 
     volume_flow: float
     water_state: WaterState
-    mass_flow: float = field(init=False)
-    enthalpy_flow: float = field(init=False)
+    mass_flow: float = field(init=False, compare=False)
+    enthalpy_flow: float = field(init=False, compare=False)
 
     def __post_init__(self):
-        self.mass_flow = self.volume_flow * self.water_state.density
-        self.enthalpy_flow = self.water_state.enthalpy * self.mass_flow
+        mass_flow = self.volume_flow * self.water_state.density
+        object.__setattr__(self, "mass_flow", mass_flow)
+        object.__setattr__(self, "enthalpy_flow", self.water_state.enthalpy * mass_flow)
 
     @classmethod
     def from_volume_flow_temperature(
         cls, volume_flow: float, temperature: float
     ) -> Self:
         """init with volume_flow and temperature"""
-        return cls(volume_flow, WaterState(temperature))
+        return cls(volume_flow, WaterState.get(temperature))
 
     @classmethod
     def from_mass_flow_temperature(cls, mass_flow: float, temperature: float) -> Self:
         """init with mass_flow and temperature"""
-        ws = WaterState(temperature)
+        ws = WaterState.get(temperature)
         return cls(mass_flow / ws.density, ws)
 
+    @classmethod
+    @lru_cache(maxsize=4096, typed=True)
+    def zero(cls, temperature: float) -> Self:
+        """memoized empty flow at temperature, flows are immutable and can be shared"""
+        return cls(0, WaterState.get(temperature))
+
     def str_short(self) -> str:
         """returns a short strin repr"""
         vol = f"V={self.volume_flow*3600:.1f}m³/h"
@@ -60,23 +80,31 @@ class WaterFlow:
         return "; ".join([vol, t])
 
 
-@dataclass
+def cache_clear() -> None:
+    """clear the memoized flows"""
+    WaterFlow.zero.cache_clear()
+
+
+@dataclass(slots=True, frozen=True)
 class HumidAirFlow:
     """A flow of air and water vapour"""
 
     volume_flow: float
     humid_air_state: HumidAirState
-    mass_flow_air: float = field(init=False)
-    mass_flow_water: float = field(init=False)
-    mass_flow: float = field(init=False)
-    enthalpy_flow: float = field(init=False)
+    mass_flow_air: float = field(init=False, compare=False)
+    mass_flow_water: float = field(init=False, compare=False)
+    mass_flow: float = field(init=False, compare=False)
+    enthalpy_flow: float = field(init=False, compare=False)
 
     def __post_init__(self):
-        self.mass_flow_air = self.volume_flow / self.humid_air_state.moist_air_volume
-        self.mass_flow_water = self.humid_air_state.hum_ratio * self.mass_flow_air
-        self.mass_flow = self.mass_flow_air + self.mass_flow_water
-        self.enthalpy_flow = (
-            self.humid_air_state.moist_air_enthalpy * self.mass_flow_air
+        has = self.humid_air_state
+        mass_flow_air = self.volume_flow / has.moist_air_volume
+        mass_flow_water = has.hum_ratio * mass_flow_air
+        object.__setattr__(self, "mass_flow_air", mass_flow_air)
+        object.__setattr__(self, "mass_flow_water", mass_flow_water)
+        object.__setattr__(self, "mass_flow", mass_flow_air + mass_flow_water)
+        object.__setattr__(
+            self, "enthalpy_flow", has.moist_air_enthalpy * mass_flow_air
         )
 
     @classmethod
@@ -96,7 +124,6 @@ class HumidAirFlow:
         t_dry_bulb = get_t_dry_bulb_from_tot_enthalpy_air_water_mix(
             hum_ratio, enthalpy_flow / (m_air + m_water), pressure
         )
-        # sat_hum_ratio = ps.GetSatHumRatio(t_dry_bulb, pressure)
         sat_hum_ratio = get_sat_hum_ratio(t_dry_bulb, pressure)
 
         if isclose(hum_ratio, sat_hum_ratio):
@@ -148,21 +175,26 @@ class HumidAirFlow:
         if rel_hum_target < self.humid_air_state.rel_hum:
             raise ValueError("rel_hum_target must be higher than current rel_hum")
 
+        ws_water = WaterState.get(t_water)
+
         def fun(v_f):
-            rel_hum_mix = self.add_water_flow(
-                WaterFlow(v_f, WaterState(t_water)), ignore_valid_range=True
-            ).humid_air_state.rel_hum
+            m_water_added = v_f * ws_water.density
+            hum_ratio = (self.mass_flow_water + m_water_added) / self.mass_flow_air
+            enthalpy = (
+                self.enthalpy_flow + m_water_added * ws_water.enthalpy
+            ) / self.mass_flow_air
+            rel_hum_mix = HumidAirState.from_hum_ratio_enthalpy(
+                hum_ratio, enthalpy
+            ).rel_hum
 
             if rel_hum_mix > 1:
                 return 1 - rel_hum_target
             return rel_hum_mix - rel_hum_target
 
-        sol = optimize.root_scalar(
-            fun, method="brentq", bracket=[0, self.volume_flow / 1e0], xtol=1e-24
-        )
+        sol = solve_brentq(fun, 0, self.volume_flow / 1e0, xtol=1e-24)
 
         if sol.converged:
-            return WaterFlow(sol.root, WaterState(t_water))
+            return WaterFlow(sol.root, ws_water)
 
         raise ValueError("Root not converged: " + sol.flag)
 
@@ -214,9 +246,7 @@ class HumidAirFlow:
             has_upper_bound.moist_air_enthalpy - self.humid_air_state.moist_air_enthalpy
         ) * self.mass_flow_air
 
-        sol = optimize.root_scalar(
-            fun, method="brentq", bracket=[h_t_lower_bound, h_f_upper_bound]
-        )
+        sol = solve_brentq(fun, h_t_lower_bound, h_f_upper_bound)
 
         if sol.converged:
             return sol.root
@@ -236,7 +266,12 @@ class HumidAirFlow:
                 raise ValueError("Relative humidity target cannot be 0")
 
         def fun(h_f):
-            rel_hum = self.add_enthalpy(h_f).humid_air_state.rel_hum
+            enthalpy = (self.enthalpy_flow + h_f) / self.mass_flow_air
+            rel_hum = HumidAirState.from_hum_ratio_enthalpy(
+                self.humid_air_state.hum_ratio,
+                enthalpy,
+                self.humid_air_state.pressure,
+            ).rel_hum
 
             return rel_hum - rel_hum_target
 
@@ -259,114 +294,79 @@ class HumidAirFlow:
             has_upper_bound.moist_air_enthalpy - self.humid_air_state.moist_air_enthalpy
         ) * self.mass_flow_air
 
-        sol = optimize.root_scalar(
-            fun, method="brentq", bracket=[h_f_lower_bound, h_f_upper_bound]
-        )
+        sol = solve_brentq(fun, h_f_lower_bound, h_f_upper_bound)
 
         if sol.converged:
             return sol.root
 
         raise ValueError("Root not converged: " + sol.flag)
 
-    # TODO test
-    # TODO is the gas ratio valid after combustion?
-    # def heat_with_gas(self, m_gas_flow: float) -> "HumidAirFlow":
-    #     """heat the humid air flow by burning gas (CH4) [kg/s]"""
-    #     mol_mass_ch4 = 16  # g/mol
-    #     mol_mass_h2o = 18  # g/mol
-
-    #     # TODO enthalpy gas flow
-
-    #     m_water_flow_combustion = m_gas_flow / mol_mass_ch4 * 2 * mol_mass_h2o
-
-    #     calorific_value_gas_gross = 12 * 1000 * 3600  # kWh/kg to J/kg
-
-    #     enthalpy_flow_combustion = m_gas_flow * calorific_value_gas_gross
-
-    #     m_water = self.mass_flow_water + m_water_flow_combustion
-    #     m_air = 1 # TODO calculate air mass after combustion
-    #     enthalpy_flow = self.enthalpy_flow + enthalpy_flow_combustion
-
-    #     return HumidAirFlow.from_m_air_m_water_enthalpy_flow(
-    #         m_air, m_water, enthalpy_flow, self.humid_air_state.pressure
-    #     )
-
     def at_reference_point_DIN1334(self, dry: bool = True) -> "HumidAirFlow":
         if dry:
-            has_din1343_dry = HumidAirState.from_t_dry_bulb_rel_hum(
-                t_dry_bulb=0,
-                rel_hum=0,
-                pressure=101325,
-            )
             return HumidAirFlow.from_m_air_HumidAirState(
-                self.mass_flow_air, has_din1343_dry
+                self.mass_flow_air, _HAS_DIN1343_DRY
             )
         else:
-            # has_din1343_wet = HumidAirState.from_t_dry_bulb_hum_ratio(
-            #     t_dry_bulb=0,
-            #     hum_ratio=self.humid_air_state.hum_ratio,
-            #     pressure=101325,
-            # )
-            # return HumidAirFlow.from_m_air_HumidAirState(
-            #     self.mass_flow_air, has_din1343_wet
-            # )
             raise ValueError("only dry reference state implemented")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AirWaterFlow:
     """A Flow of air and water"""
 
     humid_air_flow: HumidAirFlow
     water_flow: WaterFlow
-    dry: bool = field(default=True, init=False)
-    mass_flow_air: float = field(init=False)
-    mass_flow_water: float = field(init=False)
-    mass_flow: float = field(init=False)
-    enthalpy_flow: float = field(init=False)
+    dry: bool = field(default=True, init=False, compare=False)
+    mass_flow_air: float = field(init=False, compare=False)
+    mass_flow_water: float = field(init=False, compare=False)
+    mass_flow: float = field(init=False, compare=False)
+    enthalpy_flow: float = field(init=False, compare=False)
 
     def __post_init__(self):
         # TODO allow no air
-        # check if temperatures match
-        if not isclose(
-            self.humid_air_flow.humid_air_state.t_dry_bulb,
-            self.water_flow.water_state.temperature,
-        ):
+        # check if temperatures match, exact equality is the common case
+        t_air = self.humid_air_flow.humid_air_state.t_dry_bulb
+        t_water = self.water_flow.water_state.temperature
+        if t_air != t_water and not isclose(t_air, t_water):
             raise ValueError("Temperature of air- and waterflow must be equal!")
 
-        # if liquid water
-        if not isclose(self.water_flow.mass_flow, 0):
-            self.dry = False
-            # if there is liquid water the air has to be saturated
-            if not isclose(self.humid_air_flow.humid_air_state.rel_hum, 1):
-                raise ValueError("Air over liquid water has to be saturated")
+        # if liquid water the air has to be saturated
+        rel_hum = self.humid_air_flow.humid_air_state.rel_hum
+        if self.water_flow.mass_flow != 0 and rel_hum != 1 and not isclose(rel_hum, 1):
+            raise ValueError("Air over liquid water has to be saturated")
 
-        self.mass_flow_air = self.humid_air_flow.mass_flow_air
-        self.mass_flow_water = (
-            self.humid_air_flow.mass_flow_water + self.water_flow.mass_flow
-        )
-        self.mass_flow = self.mass_flow_air + self.mass_flow_water
-        self.enthalpy_flow = (
-            self.humid_air_flow.enthalpy_flow + self.water_flow.enthalpy_flow
-        )
+        self._set_derived_fields()
+
+    def _set_derived_fields(self):
+        """set the fields computed from the humid air flow and the water flow"""
+        haf, wf = self.humid_air_flow, self.water_flow
+        mass_flow_water = haf.mass_flow_water + wf.mass_flow
+        object.__setattr__(self, "dry", bool(wf.mass_flow == 0))
+        object.__setattr__(self, "mass_flow_air", haf.mass_flow_air)
+        object.__setattr__(self, "mass_flow_water", mass_flow_water)
+        object.__setattr__(self, "mass_flow", haf.mass_flow_air + mass_flow_water)
+        object.__setattr__(self, "enthalpy_flow", haf.enthalpy_flow + wf.enthalpy_flow)
+
+    @classmethod
+    def _from_validated(cls, haf: HumidAirFlow, wf: WaterFlow) -> Self:
+        """init without the checks of __post_init__, for flows that are valid by construction"""
+        awf = cls.__new__(cls)
+        object.__setattr__(awf, "humid_air_flow", haf)
+        object.__setattr__(awf, "water_flow", wf)
+        awf._set_derived_fields()
+        return awf
 
     @classmethod
     def from_humid_air_flow(cls, haf: HumidAirFlow) -> Self:
         """air water flow with humid air only"""
-        return cls(
-            haf,
-            WaterFlow(
-                0,
-                WaterState(haf.humid_air_state.t_dry_bulb),
-            ),
-        )
+        return cls._from_validated(haf, WaterFlow.zero(haf.humid_air_state.t_dry_bulb))
 
     @classmethod
     def from_water_flow(
         cls, wf: WaterFlow, pressure: float = STANDARD_PRESSURE
     ) -> Self:
         """air water flow with liquid water only"""
-        return cls(
+        return cls._from_validated(
             HumidAirFlow(
                 0,
                 HumidAirState.from_t_dry_bulb_rel_hum(
@@ -385,7 +385,6 @@ class AirWaterFlow:
         t_dry_bulb = get_t_dry_bulb_from_tot_enthalpy_air_water_mix(
             hum_ratio, enthalpy_flow / (m_air + m_water), pressure
         )
-        # sat_hum_ratio = ps.GetSatHumRatio(t_dry_bulb, pressure)
         sat_hum_ratio = get_sat_hum_ratio(t_dry_bulb, pressure)
 
         if hum_ratio <= sat_hum_ratio:
@@ -404,23 +403,31 @@ class AirWaterFlow:
         has = HumidAirState.from_t_dry_bulb_rel_hum(t_dry_bulb, 1, pressure)
         volume_flow_gas = m_air * has.moist_air_volume
         haf = HumidAirFlow(volume_flow_gas, has)
-        ws = WaterState(t_dry_bulb)
+        ws = WaterState.get(t_dry_bulb)
         volume_flow_liquid = (hum_ratio - sat_hum_ratio) * m_air / ws.density
         wf = WaterFlow(volume_flow_liquid, ws)
-        return cls(haf, wf)
+        return cls._from_validated(haf, wf)
 
     @classmethod
     def from_mixing_two_humid_air_flows(
         cls, haf_in_1: HumidAirFlow, haf_in_2: HumidAirFlow
     ) -> Self:
         """create air- waterflow by mixing a HumidAirFlow and a WaterFlow"""
+        # mixing a state with itself gives the same state
+        if haf_in_1.humid_air_state == haf_in_2.humid_air_state:
+            return cls.from_humid_air_flow(
+                HumidAirFlow(
+                    haf_in_1.volume_flow + haf_in_2.volume_flow,
+                    haf_in_1.humid_air_state,
+                )
+            )
+
         m_air = haf_in_1.mass_flow_air + haf_in_2.mass_flow_air
         m_water = haf_in_1.mass_flow_water + haf_in_2.mass_flow_water
         enthalpy_flow = haf_in_1.enthalpy_flow + haf_in_2.enthalpy_flow
-        if isclose(
-            haf_in_1.humid_air_state.pressure, haf_in_2.humid_air_state.pressure
-        ):
-            pressure = haf_in_1.humid_air_state.pressure
+        pressure = haf_in_1.humid_air_state.pressure
+        pressure_2 = haf_in_2.humid_air_state.pressure
+        if pressure == pressure_2 or isclose(pressure, pressure_2):
             return cls.from_m_air_m_water_enthalpy_flow(
                 m_air, m_water, enthalpy_flow, pressure
             )
@@ -454,6 +461,153 @@ class AirWaterFlow:
         return "; ".join([haf, wf])
 
 
+def _isclose_array(a: np.ndarray, b: np.ndarray) -> bool:
+    """True if all elements are close, same relative tolerance as math.isclose"""
+    return bool(np.all(np.abs(a - b) <= 1e-9 * np.maximum(np.abs(a), np.abs(b))))
+
+
+@dataclass
+class HumidAirFlowBatch:
+    """A batch of humid air flows stored as arrays"""
+
+    volume_flow: np.ndarray
+    mass_flow_air: np.ndarray
+    mass_flow_water: np.ndarray
+    enthalpy_flow: np.ndarray
+    pressure: np.ndarray
+
+    @classmethod
+    def from_list(cls, hafs: list[HumidAirFlow]) -> Self:
+        """create batch from a list of humid air flows"""
+        return cls(
+            np.array([haf.volume_flow for haf in hafs], dtype=float),
+            np.array([haf.mass_flow_air for haf in hafs], dtype=float),
+            np.array([haf.mass_flow_water for haf in hafs], dtype=float),
+            np.array([haf.enthalpy_flow for haf in hafs], dtype=float),
+            np.array([haf.humid_air_state.pressure for haf in hafs], dtype=float),
+        )
+
+    @classmethod
+    def from_t_dry_bulb_rel_hum(
+        cls,
+        volume_flow: np.ndarray,
+        t_dry_bulb: np.ndarray,
+        rel_hum: np.ndarray,
+        pressure: np.ndarray | float = STANDARD_PRESSURE,
+    ) -> Self:
+        """create batch from arrays of volume_flow, t_dry_bulb, rel_hum and pressure"""
+        volume_flow, t_dry_bulb, rel_hum, pressure = (
+            a.ravel()
+            for a in np.broadcast_arrays(
+                *(
+                    np.asarray(a, dtype=float)
+                    for a in (volume_flow, t_dry_bulb, rel_hum, pressure)
+                )
+            )
+        )
+
+        _, hum_ratio = get_vap_pres_hum_ratio_from_rel_hum(
+            t_dry_bulb, rel_hum, pressure
+        )
+        mass_flow_air = volume_flow / get_moist_air_volume(
+            t_dry_bulb, hum_ratio, pressure
+        )
+        return cls(
+            volume_flow,
+            mass_flow_air,
+            hum_ratio * mass_flow_air,
+            get_moist_air_enthalpy(t_dry_bulb, hum_ratio) * mass_flow_air,
+            pressure,
+        )
+
+    @classmethod
+    def from_states(
+        cls, volume_flow: np.ndarray, humid_air_states: list[HumidAirState]
+    ) -> Self:
+        """create batch from an array of volume flows and a list of humid air states"""
+        return cls.from_humid_air_state_batch(
+            volume_flow, HumidAirStateBatch.from_list(humid_air_states)
+        )
+
+    @classmethod
+    def from_humid_air_state_batch(
+        cls, volume_flow: np.ndarray, humid_air_states: HumidAirStateBatch
+    ) -> Self:
+        """create batch from an array of volume flows and a batch of humid air states"""
+        volume_flow = np.broadcast_to(
+            np.asarray(volume_flow, dtype=float), len(humid_air_states)
+        ).copy()
+        mass_flow_air = volume_flow / humid_air_states.moist_air_volume
+        return cls(
+            volume_flow,
+            mass_flow_air,
+            humid_air_states.hum_ratio * mass_flow_air,
+            humid_air_states.moist_air_enthalpy * mass_flow_air,
+            humid_air_states.pressure,
+        )
+
+    def __len__(self) -> int:
+        return len(self.volume_flow)
+
+    def to_list(self) -> list[HumidAirFlow]:
+        """list of the humid air flows of the batch"""
+        return [
+            HumidAirFlow.from_m_air_m_water_enthalpy_flow(*row)
+            for row in zip(
+                self.mass_flow_air.tolist(),
+                self.mass_flow_water.tolist(),
+                self.enthalpy_flow.tolist(),
+                self.pressure.tolist(),
+            )
+        ]
+
+    def mix_pairwise(self, other: "HumidAirFlowBatch") -> Self:
+        """
+        mix the flows of two batches element-wise, raises error if there is condensation
+        the mixed states are calculated on the arrays
+        """
+        p_0 = self.pressure
+        if not _isclose_array(p_0, other.pressure):
+            raise ValueError("The pressure of the mixing air streams must be equal")
+
+        mass_flow_air = self.mass_flow_air + other.mass_flow_air
+        mass_flow_water = self.mass_flow_water + other.mass_flow_water
+        enthalpy_flow = self.enthalpy_flow + other.enthalpy_flow
+        hum_ratio = mass_flow_water / mass_flow_air
+
+        # the enthalpy of unsaturated air is linear in the temperature
+        t_dry_bulb = get_t_dry_bulb_from_moist_air_enthalpy(
+            enthalpy_flow / mass_flow_air, hum_ratio
+        )
+        # same tolerance as math.isclose at saturation
+        if np.any(hum_ratio > get_sat_hum_ratio(t_dry_bulb, p_0) * (1 + 1e-9)):
+            raise ValueError("Condensation")
+
+        return type(self)(
+            mass_flow_air * get_moist_air_volume(t_dry_bulb, hum_ratio, p_0),
+            mass_flow_air,
+            mass_flow_water,
+            enthalpy_flow,
+            p_0,
+        )
+
+    def mix(self) -> HumidAirFlow:
+        """mix all flows of the batch, raises error if there is condensation"""
+        if not _isclose_array(self.pressure[:-1], self.pressure[1:]):
+            raise ValueError("Pressure of mixing air flows must be equal")
+
+        awf = AirWaterFlow.from_m_air_m_water_enthalpy_flow(
+            m_air=float(self.mass_flow_air.sum()),
+            m_water=float(self.mass_flow_water.sum()),
+            enthalpy_flow=float(self.enthalpy_flow.sum()),
+            pressure=float(self.pressure[0]),
+        )
+
+        if awf.dry:
+            return awf.humid_air_flow
+        raise ValueError("Condensation")
+
+
 def mix_two_humid_air_flows(
     haf_in_1: HumidAirFlow, haf_in_2: HumidAirFlow
 ) -> HumidAirFlow:
@@ -470,7 +624,7 @@ def mix_humid_air_flows(hafs_in: list[HumidAirFlow]) -> HumidAirFlow:
 
     pressures = [haf.humid_air_state.pressure for haf in hafs_in]
     if not all(
-        isclose(pressures[i], pressures[i + 1]) for i in range(len(pressures) - 1)
+        p_0 == p_1 or isclose(p_0, p_1) for p_0, p_1 in zip(pressures, pressures[1:])
     ):
         raise ValueError("Pressure of mixing air flows must be equal")
 
@@ -503,7 +657,7 @@ def mix_air_water_flows(flows_in: list[HumidAirFlow | AirWaterFlow]) -> AirWater
     )
 
     if not all(
-        isclose(pressures[i], pressures[i + 1]) for i in range(len(pressures) - 1)
+        p_0 == p_1 or isclose(p_0, p_1) for p_0, p_1 in zip(pressures, pressures[1:])
     ):
         raise ValueError("Pressure of mixing air flows must be equal")
 
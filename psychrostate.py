@@ -12,10 +12,13 @@ Created on 2024-01-23 12:38:04
 """
 
 from typing import Self
-from math import exp, isclose
+from math import exp, isclose, log, sqrt
 from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
 from scipy import optimize
 
+from arrayutils import any_true
 from waterstate import (
     get_enthalpy_water,
     get_enthalpy_water_liquid,
@@ -25,23 +28,59 @@ from waterstate import (
 
 STANDARD_PRESSURE = 101_325  # Pa
 
+# saturation vapor pressure over liquid water, see get_sat_vap_pressure_liquid_water
+_P_CRITICAL = 22.064e6  # Pa
+_T_CRITICAL = 647.096  # K
+_COEF_SAT_LIQUID = (
+    -7.85951783,
+    1.84408259,
+    -11.7866497,
+    22.6807411,
+    -15.9618719,
+    1.80122502,
+)
+
+# saturation vapor pressure over ice, see get_sat_vap_pressure_water_ice
+_P_TRIPLE = 611.657  # Pa
+_T_TRIPLE = 273.16  # K
+_COEF_SAT_ICE = (-0.212144006e2, 0.273203819e2, -0.610598130e1)
+_EXP_SAT_ICE = (0.333333333e-2, 0.120666667e1, 0.170333333e1)
+
+
+def cache_clear() -> None:
+    """clear the memoized states, saturation values and temperature inversions"""
+    HumidAirState.from_t_dry_bulb_rel_hum.cache_clear()
+    HumidAirState.from_t_dry_bulb_hum_ratio.cache_clear()
+    HumidAirState.from_t_dry_bulb_t_wet_bulb.cache_clear()
+    HumidAirState.from_hum_ratio_enthalpy.cache_clear()
+    _get_sat_vap_pressure_scalar.cache_clear()
+    _get_sat_hum_ratio_scalar.cache_clear()
+    _sat_state.cache_clear()
+    _get_t_dry_bulb_from_tot_enthalpy_air_water_mix_scalar.cache_clear()
 
-def get_pressure_from_height(height_above_sea_level: float) -> float:
+
+def get_pressure_from_height(
+    height_above_sea_level: float | np.ndarray,
+) -> float | np.ndarray:
     """
     Calculate the mean atmospheric pressure at height above mean sea level.
 
     Args:
-        height_above_sea_level (float): in m
+        height_above_sea_level (float | np.ndarray): in m
 
     Returns:
-        float: pressure in Pa
+        float | np.ndarray: pressure in Pa
     """
-    return STANDARD_PRESSURE * exp(-height_above_sea_level / 8435)
+    exp_ = np.exp if isinstance(height_above_sea_level, np.ndarray) else exp
+    return STANDARD_PRESSURE * exp_(-height_above_sea_level / 8435)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class HumidAirState:
-    """a humid air state"""
+    """
+    a humid air state
+    states are immutable, the constructors are memoized and share their results
+    """
 
     pressure: float
     hum_ratio: float
@@ -54,39 +93,26 @@ class HumidAirState:
     moist_air_volume: float
 
     @classmethod
+    @lru_cache(maxsize=4096, typed=True)
     def from_t_dry_bulb_rel_hum(
         cls, t_dry_bulb: float, rel_hum: float, pressure: float = STANDARD_PRESSURE
     ) -> Self:
         """initiate HumidAirState with t_dry_bulb and rel_hum"""
 
-        if 0 > rel_hum > 1:
-            raise ValueError("Wet bulb temperature is above dry bulb temperature")
+        if not 0 <= rel_hum <= 1 and not isclose(rel_hum, 1):
+            raise ValueError("Relative humidity is outside range [0, 1]")
+        # rounding above saturation is stored as saturated
+        rel_hum = min(rel_hum, 1.0)
 
-        hum_ratio = get_hum_ratio_from_rel_hum(t_dry_bulb, rel_hum, pressure)
-        vap_pres = get_vap_press_from_hum_ratio(hum_ratio, pressure)
-        t_wet_bulb = get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
-            t_dry_bulb, hum_ratio, pressure
-        )
-        t_dew_point = get_t_dew_point_from_vap_pressure(vap_pres)
-        moist_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-        moist_air_volume = get_moist_air_volume(
-            t_dry_bulb,
-            hum_ratio,
-            pressure,
-        )
-        return cls(
-            pressure,
-            hum_ratio,
-            t_dry_bulb,
-            t_wet_bulb,
-            t_dew_point,
-            rel_hum,
-            vap_pres,
-            moist_air_enthalpy,
-            moist_air_volume,
+        sat_vap_pressure = get_sat_vap_pressure(t_dry_bulb)
+        vap_pres = get_vap_pres_from_rel_hum(t_dry_bulb, rel_hum, sat_vap_pressure)
+        hum_ratio = get_hum_ratio_from_vap_press(vap_pres, pressure)
+        return cls._from_known_properties(
+            pressure, hum_ratio, t_dry_bulb, rel_hum, vap_pres
         )
 
     @classmethod
+    @lru_cache(maxsize=4096, typed=True)
     def from_t_dry_bulb_hum_ratio(
         cls, t_dry_bulb: float, hum_ratio: float, pressure: float = STANDARD_PRESSURE
     ) -> Self:
@@ -107,29 +133,12 @@ class HumidAirState:
             else:
                 raise ValueError("relative Humidity > 1; Condensation!")
 
-        t_wet_bulb = get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
-            t_dry_bulb, hum_ratio, pressure
-        )
-        t_dew_point = get_t_dew_point_from_vap_pressure(vap_pres)
-        moist_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-        moist_air_volume = get_moist_air_volume(
-            t_dry_bulb,
-            hum_ratio,
-            pressure,
-        )
-        return cls(
-            pressure,
-            hum_ratio,
-            t_dry_bulb,
-            t_wet_bulb,
-            t_dew_point,
-            rel_hum,
-            vap_pres,
-            moist_air_enthalpy,
-            moist_air_volume,
+        return cls._from_known_properties(
+            pressure, hum_ratio, t_dry_bulb, rel_hum, vap_pres
         )
 
     @classmethod
+    @lru_cache(maxsize=4096, typed=True)
     def from_t_dry_bulb_t_wet_bulb(
         cls, t_dry_bulb: float, t_wet_bulb: float, pressure: float = STANDARD_PRESSURE
     ) -> Self:
@@ -147,26 +156,12 @@ class HumidAirState:
         vap_pres = get_vap_press_from_hum_ratio(hum_ratio, pressure)
         rel_hum = get_rel_hum_from_vap_pressure(t_dry_bulb, vap_pres)
 
-        t_dew_point = get_t_dew_point_from_vap_pressure(vap_pres)
-        moist_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-        moist_air_volume = get_moist_air_volume(
-            t_dry_bulb,
-            hum_ratio,
-            pressure,
-        )
-        return cls(
-            pressure,
-            hum_ratio,
-            t_dry_bulb,
-            t_wet_bulb,
-            t_dew_point,
-            rel_hum,
-            vap_pres,
-            moist_air_enthalpy,
-            moist_air_volume,
+        return cls._from_known_properties(
+            pressure, hum_ratio, t_dry_bulb, rel_hum, vap_pres, t_wet_bulb=t_wet_bulb
         )
 
     @classmethod
+    @lru_cache(maxsize=4096, typed=True)
     def from_hum_ratio_enthalpy(
         cls,
         hum_ratio: float,
@@ -179,24 +174,58 @@ class HumidAirState:
         t_dry_bulb = get_t_dry_bulb_from_tot_enthalpy_air_water_mix(
             hum_ratio, tot_enthalpy, pressure
         )
-        t_wet_bulb = get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
-            t_dry_bulb, hum_ratio, pressure
-        )
-        t_dew_point = get_t_dew_point_from_vap_pressure(vap_pres)
         rel_hum = get_rel_hum_from_vap_pressure(t_dry_bulb, vap_pres)
-        moist_air_volume = get_moist_air_volume(t_dry_bulb, hum_ratio, pressure)
+        return cls._from_known_properties(
+            pressure,
+            hum_ratio,
+            t_dry_bulb,
+            rel_hum,
+            vap_pres,
+            moist_air_enthalpy=moist_air_enthalpy,
+        )
+
+    @classmethod
+    def _from_known_properties(
+        cls,
+        pressure: float,
+        hum_ratio: float,
+        t_dry_bulb: float,
+        rel_hum: float,
+        vap_pres: float,
+        t_wet_bulb: float | None = None,
+        moist_air_enthalpy: float | None = None,
+    ) -> Self:
+        """complete a HumidAirState from its known properties, shared by the constructors"""
+        if t_wet_bulb is None:
+            t_wet_bulb = get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
+                t_dry_bulb, hum_ratio, pressure
+            )
+        if moist_air_enthalpy is None:
+            moist_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
         return cls(
             pressure,
             hum_ratio,
             t_dry_bulb,
             t_wet_bulb,
-            t_dew_point,
+            get_t_dew_point_from_vap_pressure(vap_pres),
             rel_hum,
             vap_pres,
             moist_air_enthalpy,
-            moist_air_volume,
+            get_moist_air_volume(t_dry_bulb, hum_ratio, pressure),
         )
 
+    @classmethod
+    def batch_from_t_dry_bulb_rel_hum(
+        cls,
+        t_dry_bulb: np.ndarray,
+        rel_hum: np.ndarray,
+        pressure: np.ndarray | float = STANDARD_PRESSURE,
+    ) -> list[Self]:
+        """list of HumidAirStates from arrays of t_dry_bulb, rel_hum and pressure"""
+        return HumidAirStateBatch.from_t_dry_bulb_rel_hum(
+            t_dry_bulb, rel_hum, pressure
+        ).to_list()
+
     def at_t_dry_bulb(self, t_dry_bulb: float) -> "HumidAirState":
         """return the humid air state with same humidity ratio at a different temperature"""
         return HumidAirState.from_t_dry_bulb_hum_ratio(
@@ -204,22 +233,155 @@ class HumidAirState:
         )
 
 
-def get_sat_vap_pressure(t_dry_bulb: float) -> float:
+def get_vap_pres_hum_ratio_from_rel_hum(
+    t_dry_bulb: np.ndarray, rel_hum: np.ndarray, pressure: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return vapor pressure and humidity ratio given arrays of dry-bulb temperature,
+    relative humidity and pressure, relative humidity is checked for range [0, 1]
+    """
+    # same tolerance as math.isclose at the upper limit, NaN is rejected
+    if not np.all((0 <= rel_hum) & (rel_hum <= 1 + 1e-9)):
+        raise ValueError("Relative humidity is outside range [0, 1]")
+
+    vap_pres = np.minimum(rel_hum, 1) * get_sat_vap_pressure(t_dry_bulb)
+    return vap_pres, get_hum_ratio_from_vap_press(vap_pres, pressure)
+
+
+@dataclass
+class HumidAirStateBatch:
+    """A batch of humid air states stored as arrays"""
+
+    pressure: np.ndarray
+    hum_ratio: np.ndarray
+    t_dry_bulb: np.ndarray
+    t_wet_bulb: np.ndarray
+    t_dew_point: np.ndarray
+    rel_hum: np.ndarray
+    vap_pres: np.ndarray
+    moist_air_enthalpy: np.ndarray
+    moist_air_volume: np.ndarray
+
+    @classmethod
+    def from_list(cls, humid_air_states: list[HumidAirState]) -> Self:
+        """create batch from a list of humid air states"""
+        return cls(
+            np.array([has.pressure for has in humid_air_states], dtype=float),
+            np.array([has.hum_ratio for has in humid_air_states], dtype=float),
+            np.array([has.t_dry_bulb for has in humid_air_states], dtype=float),
+            np.array([has.t_wet_bulb for has in humid_air_states], dtype=float),
+            np.array([has.t_dew_point for has in humid_air_states], dtype=float),
+            np.array([has.rel_hum for has in humid_air_states], dtype=float),
+            np.array([has.vap_pres for has in humid_air_states], dtype=float),
+            np.array([has.moist_air_enthalpy for has in humid_air_states], dtype=float),
+            np.array([has.moist_air_volume for has in humid_air_states], dtype=float),
+        )
+
+    @classmethod
+    def from_t_dry_bulb_rel_hum(
+        cls,
+        t_dry_bulb: np.ndarray,
+        rel_hum: np.ndarray,
+        pressure: np.ndarray | float = STANDARD_PRESSURE,
+    ) -> Self:
+        """
+        create batch from arrays of t_dry_bulb, rel_hum and pressure
+        the explicit properties are calculated element-wise on the arrays
+        """
+        t_dry_bulb, rel_hum, pressure = (
+            a.ravel()
+            for a in np.broadcast_arrays(
+                *(np.asarray(a, dtype=float) for a in (t_dry_bulb, rel_hum, pressure))
+            )
+        )
+
+        vap_pres, hum_ratio = get_vap_pres_hum_ratio_from_rel_hum(
+            t_dry_bulb, rel_hum, pressure
+        )
+        rel_hum = np.minimum(rel_hum, 1)
+
+        # the implicit properties are solved per state
+        t_wet_bulb = np.array(
+            [
+                get_t_wet_bulb_from_t_dry_bulb_hum_ratio(t, w, p)
+                for t, w, p in zip(
+                    t_dry_bulb.tolist(), hum_ratio.tolist(), pressure.tolist()
+                )
+            ],
+            dtype=float,
+        )
+        t_dew_point = np.array(
+            [get_t_dew_point_from_vap_pressure(v) for v in vap_pres.tolist()],
+            dtype=float,
+        )
+
+        return cls(
+            pressure,
+            hum_ratio,
+            t_dry_bulb,
+            t_wet_bulb,
+            t_dew_point,
+            rel_hum,
+            vap_pres,
+            get_moist_air_enthalpy(t_dry_bulb, hum_ratio),
+            get_moist_air_volume(t_dry_bulb, hum_ratio, pressure),
+        )
+
+    def __len__(self) -> int:
+        return len(self.t_dry_bulb)
+
+    def to_list(self) -> list[HumidAirState]:
+        """list of the humid air states of the batch"""
+        return [
+            HumidAirState(*row)
+            for row in zip(
+                self.pressure.tolist(),
+                self.hum_ratio.tolist(),
+                self.t_dry_bulb.tolist(),
+                self.t_wet_bulb.tolist(),
+                self.t_dew_point.tolist(),
+                self.rel_hum.tolist(),
+                self.vap_pres.tolist(),
+                self.moist_air_enthalpy.tolist(),
+                self.moist_air_volume.tolist(),
+            )
+        ]
+
+
+def get_sat_vap_pressure(t_dry_bulb: float | np.ndarray) -> float | np.ndarray:
     """
     calculate the saturation vapor pressure of water / ice
+    element-wise if t_dry_bulb is an array
     """
+    if isinstance(t_dry_bulb, np.ndarray):
+        if any_true(-223.15 > t_dry_bulb) or any_true(373.9 < t_dry_bulb):
+            raise ValueError("Invalid temperature range -223.15°C<=t<=373.9°C")
+        return np.where(
+            0.01 <= t_dry_bulb,
+            _get_sat_vap_pressure_liquid_water(np.maximum(t_dry_bulb, 0.01)),
+            _get_sat_vap_pressure_water_ice(np.minimum(t_dry_bulb, 0.01)),
+        )
+
+    return _get_sat_vap_pressure_scalar(t_dry_bulb)
+
+
+@lru_cache(maxsize=4096)
+def _get_sat_vap_pressure_scalar(t_dry_bulb: float) -> float:
+    """saturation vapor pressure of water / ice for a single temperature, memoized"""
     if -223.15 > t_dry_bulb or 373.9 < t_dry_bulb:
         raise ValueError(
             f"Invalid temperature range -223.15°C<=t<=373.9°C; {t_dry_bulb:=.2f}"
         )
 
     if 0.01 <= t_dry_bulb:
-        return get_sat_vap_pressure_liquid_water(t_dry_bulb=t_dry_bulb)
+        return _get_sat_vap_pressure_liquid_water(t_dry_bulb)
 
-    return get_sat_vap_pressure_water_ice(t_dry_bulb=t_dry_bulb)
+    return _get_sat_vap_pressure_water_ice(t_dry_bulb)
 
 
-def get_sat_vap_pressure_liquid_water(t_dry_bulb: float) -> float:
+def get_sat_vap_pressure_liquid_water(
+    t_dry_bulb: float | np.ndarray,
+) -> float | np.ndarray:
     """
     calculate the saturation vapor pressure of water
 
@@ -228,39 +390,45 @@ def get_sat_vap_pressure_liquid_water(t_dry_bulb: float) -> float:
     Journal of Applied Meteorology and Climatology, Bd. 57, Nr. 6, S. 1265-1272, Juni 2018,
     doi: 10.1175/JAMC-D-17-0334.1.
     """
-    if 0.01 > t_dry_bulb or 373.9 < t_dry_bulb:
-        raise ValueError(
-            f"Invalid temperature range 0.01°C<=t<=373.9°C; {t_dry_bulb:=.2f}"
-        )
-
-    p_c = 22.064e6  # Pa
-    t_c = 647.096  # K
-
-    t_ = 1 - (273.15 + t_dry_bulb) / t_c
-    a1 = -7.85951783
-    a2 = 1.84408259
-    a3 = -11.7866497
-    a4 = 22.6807411
-    a5 = -15.9618719
-    a6 = 1.80122502
-
-    p_s = p_c * exp(
-        (t_c / (273.15 + t_dry_bulb))
+    if any_true(0.01 > t_dry_bulb) or any_true(373.9 < t_dry_bulb):
+        raise ValueError(f"Invalid temperature range 0.01°C<=t<=373.9°C; {t_dry_bulb}")
+
+    return _get_sat_vap_pressure_liquid_water(t_dry_bulb)
+
+
+def _get_sat_vap_pressure_liquid_water(
+    t_dry_bulb: float | np.ndarray,
+) -> float | np.ndarray:
+    """saturation vapor pressure of water without range check"""
+    p_c = _P_CRITICAL
+    t_c = _T_CRITICAL
+
+    t_k = 273.15 + t_dry_bulb
+    t_ = 1 - t_k / t_c
+    a1, a2, a3, a4, a5, a6 = _COEF_SAT_LIQUID
+
+    if isinstance(t_dry_bulb, np.ndarray):
+        exp_, sqrt_ = np.exp, np.sqrt
+    else:
+        exp_, sqrt_ = exp, sqrt
+
+    # powers 1.5, 3, 3.5, 4 and 7.5 of t_ from one sqrt and products
+    sqrt_t_ = sqrt_(t_)
+    t_3 = t_ * t_ * t_
+    t_4 = t_3 * t_
+    p_s = p_c * exp_(
+        (t_c / t_k)
         * (
-            a1 * t_
-            + a2 * t_**1.5
-            + a3 * t_**3
-            + a4 * t_**3.5
-            + a5 * t_**4
-            + a6 * t_**7.5
+            t_ * (a1 + a2 * sqrt_t_)
+            + t_3 * (a3 + a4 * sqrt_t_ + a5 * t_ + a6 * t_4 * sqrt_t_)
         )
     )
     return p_s
 
 
 def get_sat_vap_pressure_water_ice(
-    t_dry_bulb: float, *, ignore_valid_range: bool = False
-) -> float:
+    t_dry_bulb: float | np.ndarray, *, ignore_valid_range: bool = False
+) -> float | np.ndarray:
     """
     calculate the saturation vapor pressure of water
 
@@ -270,30 +438,71 @@ def get_sat_vap_pressure_water_ice(
     doi: 10.1063/1.3657937.
     """
     if not ignore_valid_range:
-        if -223.15 > t_dry_bulb or 0.01 < t_dry_bulb:
+        if any_true(-223.15 > t_dry_bulb) or any_true(0.01 < t_dry_bulb):
             raise ValueError(
-                f"Invalid temperature range -223.15°C<=t<=0.01°C; {t_dry_bulb:=.2f}"
+                f"Invalid temperature range -223.15°C<=t<=0.01°C; {t_dry_bulb}"
             )
 
-    p_t = 611.657
-    t_t = 273.16
+    return _get_sat_vap_pressure_water_ice(t_dry_bulb)
+
+
+def _get_sat_vap_pressure_water_ice(
+    t_dry_bulb: float | np.ndarray,
+) -> float | np.ndarray:
+    """saturation vapor pressure of ice without range check"""
+    p_t = _P_TRIPLE
+    t_t = _T_TRIPLE
 
     t = 273.15 + t_dry_bulb
     t_ = t / t_t
 
-    b1 = -0.212144006e2
-    b2 = 0.273203819e2
-    b3 = -0.610598130e1
+    b1, b2, b3 = _COEF_SAT_ICE
+    e1, e2, e3 = _EXP_SAT_ICE
 
-    p_s = p_t * exp(
-        (t_t / t)
-        * (b1 * t_**0.333333333e-2 + b2 * t_**0.120666667e1 + b3 * t_**0.170333333e1)
-    )
+    exp_ = np.exp if isinstance(t_dry_bulb, np.ndarray) else exp
+    p_s = p_t * exp_((t_t / t) * (b1 * t_**e1 + b2 * t_**e2 + b3 * t_**e3))
     return p_s
 
 
-def get_vap_pres_from_rel_hum(t_dry_bulb: float, rel_hum: float) -> float:
-    """Return partial pressure of water vapor as a function of relative humidity and temperature."""
+def _get_log_sat_vap_pressure_and_slope(t_dry_bulb: float) -> tuple[float, float]:
+    """
+    natural logarithm of the saturation vapor pressure of water / ice
+    and its analytic derivative with respect to the temperature in 1/K
+    """
+    t_k = 273.15 + t_dry_bulb
+
+    if 0.01 <= t_dry_bulb:
+        a1, a2, a3, a4, a5, a6 = _COEF_SAT_LIQUID
+        t_ = 1 - t_k / _T_CRITICAL
+        sqrt_t_ = sqrt(t_)
+        t_3 = t_ * t_ * t_
+        t_4_5 = t_3 * t_ * sqrt_t_
+        f = t_ * (a1 + a2 * sqrt_t_) + t_3 * (a3 + a4 * sqrt_t_ + a5 * t_ + a6 * t_4_5)
+        df = (
+            a1
+            + 1.5 * a2 * sqrt_t_
+            + t_ * t_ * (3 * a3 + 3.5 * a4 * sqrt_t_ + 4 * a5 * t_ + 7.5 * a6 * t_4_5)
+        )
+        log_p_s = log(_P_CRITICAL) + _T_CRITICAL / t_k * f
+        return log_p_s, -(_T_CRITICAL / t_k * f + df) / t_k
+
+    b1, b2, b3 = _COEF_SAT_ICE
+    e1, e2, e3 = _EXP_SAT_ICE
+    t_ = t_k / _T_TRIPLE
+    g1, g2, g3 = b1 * t_**e1, b2 * t_**e2, b3 * t_**e3
+    g = g1 + g2 + g3
+    dg = (e1 * g1 + e2 * g2 + e3 * g3) / t_
+    log_p_s = log(_P_TRIPLE) + _T_TRIPLE / t_k * g
+    return log_p_s, (dg - _T_TRIPLE / t_k * g) / t_k
+
+
+def get_vap_pres_from_rel_hum(
+    t_dry_bulb: float, rel_hum: float, sat_vap_pressure: float | None = None
+) -> float:
+    """
+    Return partial pressure of water vapor as a function of relative humidity and temperature.
+    sat_vap_pressure at t_dry_bulb can be passed if it is already known.
+    """
 
     if isclose(0, rel_hum):
         rel_hum = 0
@@ -302,11 +511,50 @@ def get_vap_pres_from_rel_hum(t_dry_bulb: float, rel_hum: float) -> float:
     elif 0 > rel_hum or 1 < rel_hum:
         raise ValueError("Relative humidity is outside range [0, 1]")
 
-    return rel_hum * get_sat_vap_pressure(t_dry_bulb)
+    if sat_vap_pressure is None:
+        sat_vap_pressure = get_sat_vap_pressure(t_dry_bulb)
+
+    return rel_hum * sat_vap_pressure
+
+
+def solve_brentq(fun, a: float, b: float, **kwargs) -> optimize.RootResults:
+    """
+    bracketed root of fun with optimize.brentq, returns the RootResults
+    like optimize.root_scalar, a NaN value of fun gives an unconverged result
+    """
+    try:
+        _, sol = optimize.brentq(fun, a, b, full_output=True, disp=False, **kwargs)
+    except ValueError as e:
+        # brentq raises on NaN values of fun and on brackets without a sign change,
+        # only the first is reported as not converged, like root_scalar does
+        f_a, f_b = fun(a), fun(b)
+        if np.isnan(f_a):
+            root = a
+        elif np.isnan(f_b):
+            root = b
+        elif np.sign(f_a) != np.sign(f_b):
+            # NaN inside the bracket
+            root = np.nan
+        else:
+            raise
+        sol = optimize.RootResults(
+            root=root,
+            iterations=np.nan,
+            function_calls=np.nan,
+            flag=str(e),
+            method="brentq",
+        )
+    return sol
+
 
+def get_t_dew_point_from_vap_pressure(
+    vap_pres: float, t0: float | None = None
+) -> float:
+    """
+    calculate the dew point tempreture from the water vapor pressure
 
-def get_t_dew_point_from_vap_pressure(vap_pres: float) -> float:
-    """calculate the dew point tempreture from the water vapor pressure"""
+    t0 is an optional start value of the iteration, e.g. the dry bulb temperature
+    """
     if vap_pres < 0:
         raise ValueError(
             "Partial pressure of water vapor in moist air cannot be negative"
@@ -316,10 +564,15 @@ def get_t_dew_point_from_vap_pressure(vap_pres: float) -> float:
     if isclose(0, vap_pres):
         return -196
 
+    t_dew_point = _get_t_dew_point_newton(vap_pres, t0)
+    if t_dew_point is not None:
+        return t_dew_point
+
+    # fall back to the bracketed solve
     def fun(t):
         return vap_pres - get_sat_vap_pressure(t)
 
-    sol = optimize.root_scalar(fun, method="brentq", bracket=[-223.1, 373.9])
+    sol = solve_brentq(fun, -223.1, 373.9)
 
     if sol.converged:
         return sol.root
@@ -327,37 +580,74 @@ def get_t_dew_point_from_vap_pressure(vap_pres: float) -> float:
     raise ValueError("Root not converged: " + sol.flag)
 
 
-def get_hum_ratio_from_vap_press(vap_pres: float, pressure: float) -> float:
+def _get_t_dew_point_newton(vap_pres: float, t0: float | None) -> float | None:
+    """
+    newton iteration on the logarithm of the saturation vapor pressure
+    returns None if the iteration leaves the valid range or does not converge
+    """
+    log_vap_pres = log(vap_pres)
+
+    if t0 is None:
+        # start at the Magnus approximation of the dew point
+        x = log(vap_pres / 610.94)
+        t0 = 243.04 * x / (17.625 - x)
+
+    t = t0
+    for _ in range(50):
+        if -223.15 > t or 373.9 < t:
+            return None
+        log_p_s, slope = _get_log_sat_vap_pressure_and_slope(t)
+        delta_t = (log_p_s - log_vap_pres) / slope
+        t -= delta_t
+        if abs(delta_t) < 1e-9:
+            if -223.15 > t or 373.9 < t:
+                return None
+            return t
+
+    return None
+
+
+def get_hum_ratio_from_vap_press(
+    vap_pres: float | np.ndarray, pressure: float | np.ndarray
+) -> float | np.ndarray:
     """Return humidity ratio given water vapor pressure and atmospheric pressure."""
 
-    if 0 > vap_pres:
+    if any_true(0 > vap_pres):
         raise ValueError(
             "Partial pressure of water vapor in moist air cannot be negative"
         )
 
     hum_ratio = 0.621945 * vap_pres / (pressure - vap_pres)
 
-    if 0 > hum_ratio:
+    if any_true(0 > hum_ratio):
         raise ValueError("Vapour pressure water > pressure")
 
     return hum_ratio
 
 
-def get_vap_press_from_hum_ratio(hum_ratio: float, pressure: float) -> float:
+def get_vap_press_from_hum_ratio(
+    hum_ratio: float | np.ndarray, pressure: float | np.ndarray
+) -> float | np.ndarray:
     """
     Return vapor pressure given humidity ratio and pressure.
 
     """
-    if hum_ratio < 0:
+    if any_true(hum_ratio < 0):
         raise ValueError("Humidity ratio can not be negative")
 
     return pressure * hum_ratio / (0.621945 + hum_ratio)
 
 
 def get_hum_ratio_from_rel_hum(
-    t_dry_bulb: float, rel_hum: float, pressure: float = STANDARD_PRESSURE
+    t_dry_bulb: float,
+    rel_hum: float,
+    pressure: float = STANDARD_PRESSURE,
+    sat_vap_pressure: float | None = None,
 ) -> float:
-    """Return humidity ratio given dry-bulb temperature, relative humidity, and pressure."""
+    """
+    Return humidity ratio given dry-bulb temperature, relative humidity, and pressure.
+    sat_vap_pressure at t_dry_bulb can be passed if it is already known.
+    """
 
     if rel_hum < 0 or rel_hum > 1:
         raise ValueError("Relative humidity is outside range [0, 1]")
@@ -365,12 +655,14 @@ def get_hum_ratio_from_rel_hum(
     if isclose(rel_hum, 0):
         return 0
 
-    vap_pres = get_vap_pres_from_rel_hum(t_dry_bulb, rel_hum)
+    vap_pres = get_vap_pres_from_rel_hum(t_dry_bulb, rel_hum, sat_vap_pressure)
 
     return get_hum_ratio_from_vap_press(vap_pres, pressure)
 
 
-def get_moist_air_enthalpy(t_dry_bulb: float, hum_ratio: float) -> float:
+def get_moist_air_enthalpy(
+    t_dry_bulb: float | np.ndarray, hum_ratio: float | np.ndarray
+) -> float | np.ndarray:
     """
     Return moist air enthalpy given dry-bulb temperature and humidity ratio.
     J/kg(dry_Air)
@@ -380,7 +672,7 @@ def get_moist_air_enthalpy(t_dry_bulb: float, hum_ratio: float) -> float:
     doi: 10.1007/978-3-662-49568-1.
     eqn (5.70)
     """
-    if hum_ratio < 0:
+    if any_true(hum_ratio < 0):
         raise ValueError("Humidity ratio cannot be negative")
 
     t_tr = 0.01
@@ -391,7 +683,24 @@ def get_moist_air_enthalpy(t_dry_bulb: float, hum_ratio: float) -> float:
     ) * 1e3
 
 
-def get_moist_air_volume(t_dry_bulb: float, hum_ratio: float, pressure: float) -> float:
+def get_t_dry_bulb_from_moist_air_enthalpy(
+    moist_air_enthalpy: float | np.ndarray, hum_ratio: float | np.ndarray
+) -> float | np.ndarray:
+    """
+    Return dry-bulb temperature given moist air enthalpy and humidity ratio.
+    inverse of get_moist_air_enthalpy, only valid for unsaturated air
+    """
+    t_tr = 0.01
+    return (moist_air_enthalpy / 1e3 - 2500.9 * hum_ratio) / (
+        1.0046 + 1.863 * hum_ratio
+    ) + t_tr
+
+
+def get_moist_air_volume(
+    t_dry_bulb: float | np.ndarray,
+    hum_ratio: float | np.ndarray,
+    pressure: float | np.ndarray,
+) -> float | np.ndarray:
     """
     Return the specific volume of moist air given dry-bulb temperature, humidity ratio an pressure.
     m³/kg(dry_Air)
@@ -401,17 +710,40 @@ def get_moist_air_volume(t_dry_bulb: float, hum_ratio: float, pressure: float) -
     doi: 10.1007/978-3-662-49568-1.
     eqn (5.68)
     """
-    if hum_ratio < 0:
+    if any_true(hum_ratio < 0):
         raise ValueError("Humidity ratio cannot be negative")
 
     return 287.05 * (t_dry_bulb + 273.15) / pressure * (1 + hum_ratio / 0.621945)
 
 
-def get_sat_hum_ratio(t_dry_bulb: float, pressure: float) -> float:
+def get_sat_hum_ratio(
+    t_dry_bulb: float | np.ndarray, pressure: float | np.ndarray
+) -> float | np.ndarray:
     """
     Return humidity ratio of saturated air given dry-bulb temperature and pressure.
     """
-    sat_vap_pressure = get_sat_vap_pressure(t_dry_bulb)
+    if isinstance(t_dry_bulb, np.ndarray) or isinstance(pressure, np.ndarray):
+        return _get_sat_hum_ratio(get_sat_vap_pressure(t_dry_bulb), pressure)
+
+    return _get_sat_hum_ratio_scalar(t_dry_bulb, pressure)
+
+
+@lru_cache(maxsize=4096)
+def _get_sat_hum_ratio_scalar(t_dry_bulb: float, pressure: float) -> float:
+    return _get_sat_hum_ratio(get_sat_vap_pressure(t_dry_bulb), pressure)
+
+
+def _get_sat_hum_ratio(
+    sat_vap_pressure: float | np.ndarray, pressure: float | np.ndarray
+) -> float | np.ndarray:
+    """humidity ratio of saturated air given the saturation vapor pressure"""
+    if isinstance(sat_vap_pressure, np.ndarray) or isinstance(pressure, np.ndarray):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                sat_vap_pressure > pressure,
+                np.inf,
+                0.621945 * sat_vap_pressure / (pressure - sat_vap_pressure),
+            )
 
     if sat_vap_pressure > pressure:
         return float("inf")  # TODO is this ok?
@@ -420,58 +752,251 @@ def get_sat_hum_ratio(t_dry_bulb: float, pressure: float) -> float:
     return 0.621945 * sat_vap_pressure / (pressure - sat_vap_pressure)
 
 
+@lru_cache(maxsize=4096)
+def _sat_state(t_dry_bulb: float, pressure: float) -> tuple[float, float, float]:
+    """saturation vapor pressure, humidity ratio and moist air enthalpy at t_dry_bulb"""
+    sat_vap_pressure = get_sat_vap_pressure(t_dry_bulb)
+    sat_hum_ratio = _get_sat_hum_ratio(sat_vap_pressure, pressure)
+    sat_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, sat_hum_ratio)
+    return sat_vap_pressure, sat_hum_ratio, sat_air_enthalpy
+
+
 def get_sat_air_enthalpy(t_dry_bulb: float, pressure: float) -> float:
     """
     Return saturated air enthalpy given dry-bulb temperature and pressure.
     """
-    sat_hum_ratio = get_sat_hum_ratio(t_dry_bulb, pressure)
-    return get_moist_air_enthalpy(t_dry_bulb, sat_hum_ratio)
+    return _sat_state(t_dry_bulb, pressure)[2]
 
 
-def get_rel_hum_from_vap_pressure(t_dry_bulb: float, vap_pres: float) -> float:
+def get_rel_hum_from_vap_pressure(
+    t_dry_bulb: float, vap_pres: float, sat_vap_pressure: float | None = None
+) -> float:
     """
     Return relative humidity given dry-bulb temperature and vapor pressure.
+    sat_vap_pressure at t_dry_bulb can be passed if it is already known.
     """
     if vap_pres < 0:
         raise ValueError(
             "Partial pressure of water vapor in moist air cannot be negative"
         )
 
-    return vap_pres / get_sat_vap_pressure(t_dry_bulb)
+    # dry air, no need to evaluate the saturation vapor pressure
+    if vap_pres == 0:
+        return 0.0
+
+    if sat_vap_pressure is None:
+        sat_vap_pressure = get_sat_vap_pressure(t_dry_bulb)
+
+    return vap_pres / sat_vap_pressure
 
 
 def get_t_dry_bulb_from_tot_enthalpy_air_water_mix(
-    hum_ratio: float, tot_enthalpy: float, pressure: float
-) -> float:
+    hum_ratio: float | np.ndarray,
+    tot_enthalpy: float | np.ndarray,
+    pressure: float | np.ndarray,
+) -> float | np.ndarray:
     """
     calculate temperature of an air water mix at equilibrium
     WARNING: enthalpy is per the total mass, in J / kg(Air+Water)
     """
+    if not (
+        isinstance(hum_ratio, np.ndarray)
+        or isinstance(tot_enthalpy, np.ndarray)
+        or isinstance(pressure, np.ndarray)
+    ):
+        return _get_t_dry_bulb_from_tot_enthalpy_air_water_mix_scalar(
+            hum_ratio, tot_enthalpy, pressure
+        )
 
-    def fun(t):
-        return tot_enthalpy - get_tot_enthalpy_air_water_mix(hum_ratio, t, pressure)
+    hum_ratio, tot_enthalpy, pressure = np.broadcast_arrays(
+        np.asarray(hum_ratio, dtype=float),
+        np.asarray(tot_enthalpy, dtype=float),
+        np.asarray(pressure, dtype=float),
+    )
+
+    # unsaturated air has a closed form,
+    # only condensing mixtures need the scalar root solve
+    t_dry_bulb = np.array(
+        _get_t_dry_bulb_from_tot_enthalpy_unsat(hum_ratio, tot_enthalpy)
+    )
+    in_bracket = (_T_MIX_MIN <= t_dry_bulb) & (t_dry_bulb <= _T_MIX_MAX)
+    unsat = (
+        (0 <= hum_ratio)
+        & in_bracket
+        & (
+            hum_ratio
+            <= get_sat_hum_ratio(np.where(in_bracket, t_dry_bulb, 0), pressure)
+        )
+    )
+
+    for i in np.flatnonzero(~unsat):
+        t_dry_bulb.flat[i] = _get_t_dry_bulb_from_tot_enthalpy_air_water_mix_scalar(
+            float(hum_ratio.flat[i]),
+            float(tot_enthalpy.flat[i]),
+            float(pressure.flat[i]),
+        )
+
+    return t_dry_bulb
+
+
+_T_MIX_MIN = -223.1
+_T_MIX_MAX = 373.9
+
+
+@lru_cache(maxsize=4096)
+def _get_t_dry_bulb_from_tot_enthalpy_air_water_mix_scalar(
+    hum_ratio: float, tot_enthalpy: float, pressure: float
+) -> float:
+    bracket = [_T_MIX_MIN, _T_MIX_MAX]
+
+    # unsaturated air, the enthalpy is linear in the temperature
+    t_unsat = _get_t_dry_bulb_from_tot_enthalpy_unsat(hum_ratio, tot_enthalpy)
+    if 0 <= hum_ratio and bracket[0] <= t_unsat <= bracket[1]:
+        if hum_ratio <= get_sat_hum_ratio(t_unsat, pressure):
+            return t_unsat
+
+        # condensation releases enthalpy, the mix is warmer than t_unsat
+        # but colder than the dew point of hum_ratio
+        # (with a margin for rounding close to saturation)
+        t_dew_point = get_t_dew_point_from_vap_pressure(
+            get_vap_press_from_hum_ratio(hum_ratio, pressure), t_unsat
+        )
+        # the condensate enthalpy is only defined up to 150 °C
+        bracket = [
+            max(bracket[0], t_unsat - 1e-6),
+            min(bracket[1], t_dew_point + 1e-6, 150),
+        ]
+
+        t_dry_bulb = _get_t_dry_bulb_from_tot_enthalpy_sat_newton(
+            hum_ratio, tot_enthalpy, pressure, *bracket
+        )
+        if t_dry_bulb is not None:
+            return t_dry_bulb
+
+        # fall back to the bracketed solve
+        # the air is saturated within the bracket, skip the branch decision
+        def fun(t):
+            return tot_enthalpy - _get_tot_enthalpy_sat(
+                hum_ratio, t, pressure, get_sat_hum_ratio(t, pressure)
+            )
 
-    sol = optimize.root_scalar(fun, method="brentq", bracket=[-223.1, 373.9])
+    else:
+
+        def fun(t):
+            return tot_enthalpy - get_tot_enthalpy_air_water_mix(hum_ratio, t, pressure)
+
+    sol = solve_brentq(fun, *bracket)
 
     if sol.converged:
         return sol.root
     raise ArithmeticError("Root not found: " + sol.flag)
 
 
+def _get_t_dry_bulb_from_tot_enthalpy_sat_newton(
+    hum_ratio: float, tot_enthalpy: float, pressure: float, t_min: float, t_max: float
+) -> float | None:
+    """
+    newton iteration on the enthalpy of saturated air and condensate, starting at t_max
+    returns None if the iteration leaves [t_min, t_max] or does not converge
+    """
+    enthalpy = tot_enthalpy * (1 + hum_ratio)
+
+    # the enthalpy is convex in t, from above the iteration approaches the root
+    # monotonically unless it crosses the melting point
+    t = t_max
+    for _ in range(20):
+        sat_vap_pressure = get_sat_vap_pressure(t)
+        sat_hum_ratio = _get_sat_hum_ratio(sat_vap_pressure, pressure)
+        if t >= 0.01:
+            enthalpy_condensate = get_enthalpy_water_liquid(t)
+            heat_capacity_condensate = 4186
+        else:
+            enthalpy_condensate = get_enthalpy_water_ice(t)
+            heat_capacity_condensate = 2100
+        residual = (
+            get_moist_air_enthalpy(t, sat_hum_ratio)
+            + enthalpy_condensate * (hum_ratio - sat_hum_ratio)
+            - enthalpy
+        )
+
+        # derivative of the saturation humidity ratio from the slope of log(p_s)
+        d_sat_hum_ratio = (
+            sat_hum_ratio
+            * pressure
+            / (pressure - sat_vap_pressure)
+            * _get_log_sat_vap_pressure_and_slope(t)[1]
+        )
+        # derivative of get_moist_air_enthalpy along saturation plus the condensate
+        derivative = (
+            1004.6
+            + 1863 * sat_hum_ratio
+            + d_sat_hum_ratio * (2500.9e3 + 1863 * (t - 0.01) - enthalpy_condensate)
+            + heat_capacity_condensate * (hum_ratio - sat_hum_ratio)
+        )
+
+        delta_t = residual / derivative
+        t -= delta_t
+        if t_min > t or t_max < t:
+            return None
+        if abs(delta_t) < 1e-9:
+            return t
+
+    return None
+
+
 def get_tot_enthalpy_air_water_mix(
     hum_ratio: float, t_dry_bulb: float, pressure: float
 ) -> float:
     """specific enthalpy of an air water mixture at equilibrium in J / kg(Air + Water)"""
 
-    # sat_hum_ratio = ps.GetSatHumRatio(t_dry_bulb, pressure)
     sat_hum_ratio = get_sat_hum_ratio(t_dry_bulb, pressure)
 
+    if isinstance(sat_hum_ratio, np.ndarray) or isinstance(hum_ratio, np.ndarray):
+        # the branch not taken may hold inf or nan
+        with np.errstate(invalid="ignore"):
+            return np.where(
+                hum_ratio <= sat_hum_ratio,
+                _get_tot_enthalpy_unsat(hum_ratio, t_dry_bulb),
+                _get_tot_enthalpy_sat(hum_ratio, t_dry_bulb, pressure, sat_hum_ratio),
+            )
+
     # unsaturated air
     if hum_ratio <= sat_hum_ratio:
-        # recalculate with hum_ratio as the specific enthalpy per total mass
-        return get_moist_air_enthalpy(t_dry_bulb, hum_ratio) / (1 + hum_ratio)
+        return _get_tot_enthalpy_unsat(hum_ratio, t_dry_bulb)
+
+    return _get_tot_enthalpy_sat(hum_ratio, t_dry_bulb, pressure, sat_hum_ratio)
+
+
+def _get_tot_enthalpy_unsat(hum_ratio: float, t_dry_bulb: float) -> float:
+    """specific enthalpy of unsaturated air in J / kg(Air + Water)"""
+    # recalculate with hum_ratio as the specific enthalpy per total mass
+    return get_moist_air_enthalpy(t_dry_bulb, hum_ratio) / (1 + hum_ratio)
 
-    enthalpy_gas = get_sat_air_enthalpy(t_dry_bulb, pressure)
+
+def _get_t_dry_bulb_from_tot_enthalpy_unsat(
+    hum_ratio: float, tot_enthalpy: float
+) -> float:
+    """inverse of _get_tot_enthalpy_unsat"""
+    return get_t_dry_bulb_from_moist_air_enthalpy(
+        tot_enthalpy * (1 + hum_ratio), hum_ratio
+    )
+
+
+def _get_tot_enthalpy_sat(
+    hum_ratio: float, t_dry_bulb: float, pressure: float, sat_hum_ratio: float
+) -> float:
+    """specific enthalpy of saturated air over liquid water or ice in J / kg(Air + Water)"""
+    enthalpy_gas = get_moist_air_enthalpy(t_dry_bulb, sat_hum_ratio)
+
+    if isinstance(t_dry_bulb, np.ndarray):
+        enthalpy_condensate = np.where(
+            t_dry_bulb >= 0.01,
+            get_enthalpy_water_liquid(np.maximum(t_dry_bulb, 0.01)),
+            get_enthalpy_water_ice(np.minimum(t_dry_bulb, 0.01)),
+        )
+        return (enthalpy_gas + enthalpy_condensate * (hum_ratio - sat_hum_ratio)) / (
+            1 + hum_ratio
+        )
 
     # saturated air over liquid water
     if t_dry_bulb >= 0.01:
@@ -491,10 +1016,8 @@ def get_tot_enthalpy_air_water_mix(
 
 def get_t_dry_bulb_from_sat_vap_pressure(sat_vap_pressure: float) -> float:
     """get the dry bulb temperature from a given saturation vapour pressure"""
-    sol = optimize.root_scalar(
-        lambda t: get_sat_vap_pressure(t) - sat_vap_pressure,
-        method="brentq",
-        bracket=[-223.15, 373.9],
+    sol = solve_brentq(
+        lambda t: get_sat_vap_pressure(t) - sat_vap_pressure, -223.15, 373.9
     )
 
     if sol.converged:
@@ -502,6 +1025,12 @@ def get_t_dry_bulb_from_sat_vap_pressure(sat_vap_pressure: float) -> float:
     raise ArithmeticError("Root not found: " + sol.flag)
 
 
+# upper limit of the wet bulb temperature, above this vapor pressure the
+# saturation temperature of the air pressure is above the limit
+_T_WET_BULB_MAX = 150
+_SAT_VAP_PRESSURE_T_WET_BULB_MAX = get_sat_vap_pressure(_T_WET_BULB_MAX + 1e-8)
+
+
 # TODO fails tests
 def get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
     t_dry_bulb: float, hum_ratio: float, pressure: float = STANDARD_PRESSURE
@@ -509,25 +1038,35 @@ def get_t_wet_bulb_from_t_dry_bulb_hum_ratio(
     if isclose(hum_ratio, 0):
         hum_ratio = 0
 
-    if isclose(hum_ratio, get_sat_hum_ratio(t_dry_bulb, pressure)):
+    sat_hum_ratio = get_sat_hum_ratio(t_dry_bulb, pressure)
+    if isclose(hum_ratio, sat_hum_ratio):
         return t_dry_bulb
 
     elif 0 > hum_ratio:
         raise ValueError("hum_ratio cannot be negative")
 
-    t_dry_bulb_lim_up = min(150, get_t_dry_bulb_from_sat_vap_pressure(pressure) - 1e-8)
+    if pressure > _SAT_VAP_PRESSURE_T_WET_BULB_MAX:
+        t_dry_bulb_lim_up = _T_WET_BULB_MAX
+    else:
+        t_dry_bulb_lim_up = min(
+            _T_WET_BULB_MAX, get_t_dry_bulb_from_sat_vap_pressure(pressure) - 1e-8
+        )
+
+    moist_air_enthalpy = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
 
     def fun(t_wet_bulb):
+        _, sat_hum_ratio, sat_air_enthalpy = _sat_state(t_wet_bulb, pressure)
         return (
-            get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-            + (get_sat_hum_ratio(t_wet_bulb, pressure) - hum_ratio)
-            * get_enthalpy_water(t_wet_bulb)
-            - get_sat_air_enthalpy(t_wet_bulb, pressure)
+            moist_air_enthalpy
+            + (sat_hum_ratio - hum_ratio) * get_enthalpy_water(t_wet_bulb)
+            - sat_air_enthalpy
         )
 
-    sol = optimize.root_scalar(
-        fun, method="brentq", bracket=[-223.15, t_dry_bulb_lim_up]
-    )
+    # the wet bulb temperature of unsaturated air is below the dry bulb temperature
+    if hum_ratio < sat_hum_ratio:
+        t_dry_bulb_lim_up = min(t_dry_bulb_lim_up, t_dry_bulb + 1e-6)
+
+    sol = solve_brentq(fun, -223.15, t_dry_bulb_lim_up)
 
     if sol.converged:
         return sol.root
@@ -544,29 +1083,18 @@ def get_hum_ratio_from_t_dry_bulb_t_wet_bulb(
     if isclose(t_dry_bulb, t_wet_bulb, rel_tol=1e-3):
         return 0
 
-    def fun(hum_ratio):
-        h = get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-        hum_ratio_s = get_sat_hum_ratio(t_wet_bulb, pressure)
-        hum_ratio = hum_ratio
-        h_water = get_enthalpy_water(t_wet_bulb)
-        h_s = get_sat_air_enthalpy(t_wet_bulb, pressure)
-
-        print(f"{h=}")
-        print(f"{hum_ratio_s=}")
-        print(f"{hum_ratio=}")
-        print(f"{h_water=}")
-        print(f"{h_s=}")
+    # the saturation state at the wet bulb does not depend on hum_ratio
+    _, hum_ratio_s, h_s = _sat_state(t_wet_bulb, pressure)
+    h_water = get_enthalpy_water(t_wet_bulb)
 
+    def fun(hum_ratio):
         return (
             get_moist_air_enthalpy(t_dry_bulb, hum_ratio)
-            + (get_sat_hum_ratio(t_wet_bulb, pressure) - hum_ratio)
-            * get_enthalpy_water(t_wet_bulb)
-            - get_sat_air_enthalpy(t_wet_bulb, pressure)
+            + (hum_ratio_s - hum_ratio) * h_water
+            - h_s
         )
 
-    sol = optimize.root_scalar(
-        fun, method="brentq", bracket=[0, get_sat_hum_ratio(t_dry_bulb, pressure)]
-    )
+    sol = solve_brentq(fun, 0, get_sat_hum_ratio(t_dry_bulb, pressure))
 
     if sol.converged:
         return sol.root
@@ -14,6 +14,7 @@ import numpy as np
 from psychrostate import HumidAirState
 import psychrostate as ps
 import psychroflow as pf
+import waterstate as ws
 
 P = ps.STANDARD_PRESSURE
 
@@ -113,6 +114,19 @@ def test_has_init_methods():
             ),
         )
 
+    # rounding above saturation is stored as saturated
+    assert HumidAirState.from_t_dry_bulb_rel_hum(20, 1 + 1e-12).rel_hum == 1
+    assert ps.HumidAirStateBatch.from_t_dry_bulb_rel_hum(20, 1 + 1e-12).rel_hum[0] == 1
+
+    # invalid relative humidity
+    for rel_hum in [-0.1, 1.1, float("nan")]:
+        with pytest.raises(ValueError):
+            HumidAirState.from_t_dry_bulb_rel_hum(20, rel_hum)
+
+    # the wet bulb solve hits NaN values of the saturation curve
+    with pytest.raises(ArithmeticError):
+        HumidAirState.from_t_dry_bulb_t_wet_bulb(110.0, 10.0, 70000)
+
 
 # test different methods to initialize HumidAirFlow
 def test_haf_init_methods():
@@ -150,3 +164,112 @@ def test_haf_init_methods():
                 mass_flow_air, mass_flow_water, enthalpy_flow, p
             ),
         )
+
+
+# test numpy array inputs of the property functions
+def test_vectorized_kernels():
+    """tests if the property functions give the same results for arrays and scalars"""
+
+    t = np.linspace(-100, 99, 64)
+    hum_ratio = np.linspace(0, 0.1, 64)
+    pressure = np.linspace(80000, 1500000, 64)
+
+    for fun, args in [
+        (ps.get_sat_vap_pressure, (t,)),
+        (ps.get_pressure_from_height, (np.linspace(-500, 9000, 64),)),
+        (ws.get_density_water, (t,)),
+        (ws.get_enthalpy_water, (t,)),
+        (ps.get_moist_air_enthalpy, (t, hum_ratio)),
+        (ps.get_moist_air_volume, (t, hum_ratio, pressure)),
+        (ps.get_sat_hum_ratio, (t, pressure)),
+        (ps.get_tot_enthalpy_air_water_mix, (hum_ratio, t, pressure)),
+        (ps.get_vap_press_from_hum_ratio, (hum_ratio, pressure)),
+    ]:
+        values = fun(*args)
+        for i, v in enumerate(values):
+            assert v == pytest.approx(fun(*[float(a[i]) for a in args]))
+
+    tot_enthalpy = ps.get_tot_enthalpy_air_water_mix(hum_ratio, t, pressure)
+    for i, v in enumerate(
+        ps.get_t_dry_bulb_from_tot_enthalpy_air_water_mix(
+            hum_ratio, tot_enthalpy, pressure
+        )
+    ):
+        assert v == pytest.approx(t[i])
+
+    vap_pres = ps.get_vap_press_from_hum_ratio(hum_ratio, pressure)
+    assert ps.get_hum_ratio_from_vap_press(vap_pres, pressure) == pytest.approx(
+        hum_ratio
+    )
+
+
+def test_has_batch_init():
+    """tests if the batch constructor agrees with the scalar constructor"""
+    t = np.linspace(-20, 60, 16)
+    rel_hum = np.linspace(0, 1, 16)
+
+    for has, t_i, rel_hum_i in zip(
+        HumidAirState.batch_from_t_dry_bulb_rel_hum(t, rel_hum), t, rel_hum
+    ):
+        approx(has, HumidAirState.from_t_dry_bulb_rel_hum(float(t_i), float(rel_hum_i)))
+
+    batch = ps.HumidAirStateBatch.from_t_dry_bulb_rel_hum(t, rel_hum)
+    for has, has_from_list in zip(
+        batch.to_list(), ps.HumidAirStateBatch.from_list(batch.to_list()).to_list()
+    ):
+        approx(has, has_from_list)
+
+    # scalar inputs give a batch of one
+    approx(
+        ps.HumidAirStateBatch.from_t_dry_bulb_rel_hum(20.0, 0.5).to_list()[0],
+        HumidAirState.from_t_dry_bulb_rel_hum(20.0, 0.5),
+    )
+    batch = pf.HumidAirFlowBatch.from_t_dry_bulb_rel_hum(1.0, 20.0, 0.5)
+    assert len(batch) == 1
+    approx(
+        batch.mix(),
+        pf.HumidAirFlow(1.0, HumidAirState.from_t_dry_bulb_rel_hum(20.0, 0.5)),
+    )
+
+
+def test_t_dew_point():
+    """tests if the dew point is the inverse of the saturation vapor pressure"""
+    for t in np.linspace(-220, 370, 128):
+        vap_pres = ps.get_sat_vap_pressure(t)
+        assert ps.get_t_dew_point_from_vap_pressure(vap_pres) == pytest.approx(t)
+        assert ps.get_t_dew_point_from_vap_pressure(vap_pres, t0=t + 10) == (
+            pytest.approx(t)
+        )
+
+
+def test_mix_humid_air_flows_batch():
+    """tests if mixing a batch agrees with mixing pairwise"""
+    hafs = [
+        pf.HumidAirFlow(q, HumidAirState.from_t_dry_bulb_rel_hum(t, rh))
+        for q, t, rh in zip(
+            np.linspace(0.1, 2, 12), np.linspace(-10, 40, 12), np.linspace(0, 0.5, 12)
+        )
+    ]
+
+    haf_pairwise = hafs[0]
+    for haf in hafs[1:]:
+        haf_pairwise = pf.mix_two_humid_air_flows(haf_pairwise, haf)
+
+    approx(pf.mix_humid_air_flows(hafs), haf_pairwise)
+    approx(pf.HumidAirFlowBatch.from_list(hafs).mix(), haf_pairwise)
+
+    batch = pf.HumidAirFlowBatch.from_t_dry_bulb_rel_hum(
+        np.linspace(0.1, 2, 12), np.linspace(-10, 40, 12), np.linspace(0, 0.5, 12)
+    )
+    approx(batch.mix(), haf_pairwise)
+
+    batch = pf.HumidAirFlowBatch.from_states(
+        [haf.volume_flow for haf in hafs], [haf.humid_air_state for haf in hafs]
+    )
+    approx(batch.mix(), haf_pairwise)
+
+    batch_mixed = pf.HumidAirFlowBatch.from_list(hafs[:6]).mix_pairwise(
+        pf.HumidAirFlowBatch.from_list(hafs[6:])
+    )
+    for haf_mixed, haf_1, haf_2 in zip(batch_mixed.to_list(), hafs[:6], hafs[6:]):
+        approx(haf_mixed, pf.mix_two_humid_air_flows(haf_1, haf_2))
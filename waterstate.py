@@ -14,10 +14,73 @@ Created on 2024-01-23 14:59:00
 """
 
 from dataclasses import dataclass, field
+from functools import lru_cache
+from math import cbrt
+from typing import Self
+import numpy as np
 from numpy.polynomial import Chebyshev
 
-
-@dataclass
+from arrayutils import any_true
+
+# data to obtain Chebyshev polynomial
+# x = [
+#     -0,
+#     -10,
+#     -20,
+#     -30,
+#     -40,
+#     -50,
+#     -60,
+#     -80,
+#     -100,
+#     -120,
+#     -140,
+#     -160,
+#     -180,
+#     -200,
+#     -220,
+#     -240,
+#     -260,
+# ]
+
+# y = [
+#     0.9167,
+#     0.9182,
+#     0.9196,
+#     0.9209,
+#     0.9222,
+#     0.9235,
+#     0.9247,
+#     0.9269,
+#     0.9288,
+#     0.9304,
+#     0.9317,
+#     0.9326,
+#     0.9332,
+#     0.9336,
+#     0.9337,
+#     0.9338,
+#     0.9338,
+# ]
+
+# cheby_fit = Chebyshev.fit(x, y, 5)
+# rho = Chebyshev(coef=cheby_fit.coef, domain=cheby_fit.domain)
+
+# Chebyshev polynomial for density of water ice, see get_density_water_ice
+_DENSITY_WATER_ICE = Chebyshev(
+    coef=[
+        0.92801793,
+        -0.00842493,
+        -0.00290406,
+        -9.85882725e-05,
+        0.00015617,
+        -1.79696265e-05,
+    ],
+    domain=[-260.0, 0.0],
+)
+
+
+@dataclass(slots=True, frozen=True)
 class WaterState:
     """A state of water (liquid or ice)"""
 
@@ -29,29 +92,63 @@ class WaterState:
     enthalpy: float = field(init=False)
 
     def __post_init__(self):
-        self.density = get_density_water(self.temperature)
-        self.enthalpy = get_enthalpy_water(self.temperature)
+        object.__setattr__(self, "density", get_density_water(self.temperature))
+        object.__setattr__(self, "enthalpy", get_enthalpy_water(self.temperature))
+
+    @classmethod
+    @lru_cache(maxsize=4096, typed=True)
+    def get(cls, temperature: float) -> Self:
+        """memoized WaterState at temperature, states are immutable and can be shared"""
+        return cls(temperature)
+
+
+def cache_clear() -> None:
+    """clear the memoized water states and properties"""
+    WaterState.get.cache_clear()
+    _get_density_water_scalar.cache_clear()
+    _get_enthalpy_water_scalar.cache_clear()
+
 
+def get_density_water(t: float | np.ndarray) -> float | np.ndarray:
+    """density of water/ice at Temperatur t in °C, element-wise for arrays"""
+    if isinstance(t, np.ndarray):
+        if any_true(100 < t):
+            raise ValueError("t_dry_bulb > 100°C; Steam not implemented")
+        if any_true(-260 > t):
+            raise ValueError(f"Temperature range: -260°C < T < 0.01°C; GOT:{t=}°C")
+        return np.where(
+            0.01 <= t,
+            _get_density_water_liquid(np.maximum(t, 0.01)),
+            _get_density_water_ice(np.minimum(t, 0.01)),
+        )
 
-def get_density_water(t: float) -> float:
-    """density of water/ice at Temperatur t in °C"""
+    return _get_density_water_scalar(t)
+
+
+@lru_cache(maxsize=4096)
+def _get_density_water_scalar(t: float) -> float:
     if 0.01 <= t and 100 >= t:
-        return get_density_water_liquid(t)
+        return _get_density_water_liquid(t)
     elif 0.01 > t:
         return get_density_water_ice(t)
     raise ValueError("t_dry_bulb > 100°C; Steam not implemented")
 
 
-def get_density_water_liquid(t: float) -> float:
+def get_density_water_liquid(t: float | np.ndarray) -> float | np.ndarray:
     """
     [1] C. O. Popiel und J. Wojtkowiak,
     Simple Formulas for Thermophysical Properties of Liquid Water
     for Heat Transfer Calculations (from 0°C to 150°C)“,
     Heat Transfer Engineering, Bd. 19, Nr. 3, S. 87-101, Jan. 1998, doi: 10.1080/01457639808939929.
     """
-    if 0.01 > t or 150 < t:
+    if any_true(0.01 > t) or any_true(150 < t):
         raise ValueError("Temperature range: 0.01 °C < T < 150 °C")
 
+    return _get_density_water_liquid(t)
+
+
+def _get_density_water_liquid(t: float | np.ndarray) -> float | np.ndarray:
+    """density of liquid water without range check"""
     tau = 1 - (t + 273.15) / 647.096
 
     rho_c = 322
@@ -61,103 +158,81 @@ def get_density_water_liquid(t: float) -> float:
     b4 = -1.75493479
     b5 = -45.5170352
     b6 = -6.74694450e5
+
+    # all exponents are multiples of 1/3: one root, the rest are products
+    u = np.cbrt(tau) if isinstance(tau, np.ndarray) else cbrt(tau)
+    u2 = u * u
+    u4 = u2 * u2
+    u8 = u4 * u4
+    u16 = u8 * u8
+    u32 = u16 * u16
     return rho_c * (
         1
-        + b1 * tau ** (1 / 3)
-        + b2 * tau ** (2 / 3)
-        + b3 * tau ** (5 / 3)
-        + b4 * tau ** (16 / 3)
-        + b5 * tau ** (43 / 3)
-        + b6 * tau ** (110 / 3)
+        + b1 * u
+        + b2 * u2
+        + b3 * u4 * u
+        + b4 * u16
+        + b5 * u32 * u8 * u2 * u
+        + b6 * u32 * u32 * u32 * u8 * u4 * u2
     )
 
 
-def get_density_water_ice(t: float) -> float:
+def get_density_water_ice(t: float | np.ndarray) -> float | np.ndarray:
     """density of water ice
     Chebyshev polynomial(5) fittet to data from Allan H. Harvey, "PROPERTIES OF ICE AND SUPERCOOLED WATER"
     Feistel, R., and Wagner, W., "A New Equation of State for H2O Ice Ih", J. Phys. Chem. Ref. Data 35, 1021 (2006)
     """
-    if 0.01 < t or -260 > t:
+    if any_true(0.01 < t) or any_true(-260 > t):
         raise ValueError(f"Temperature range: -260°C < T < 0.01°C; GOT:{t=}°C")
 
-    # data to obtain Chebyshev polynomial
-    # x = [
-    #     -0,
-    #     -10,
-    #     -20,
-    #     -30,
-    #     -40,
-    #     -50,
-    #     -60,
-    #     -80,
-    #     -100,
-    #     -120,
-    #     -140,
-    #     -160,
-    #     -180,
-    #     -200,
-    #     -220,
-    #     -240,
-    #     -260,
-    # ]
-
-    # y = [
-    #     0.9167,
-    #     0.9182,
-    #     0.9196,
-    #     0.9209,
-    #     0.9222,
-    #     0.9235,
-    #     0.9247,
-    #     0.9269,
-    #     0.9288,
-    #     0.9304,
-    #     0.9317,
-    #     0.9326,
-    #     0.9332,
-    #     0.9336,
-    #     0.9337,
-    #     0.9338,
-    #     0.9338,
-    # ]
-
-    # cheby_fit = Chebyshev.fit(x, y, 5)
-    # rho = Chebyshev(coef=cheby_fit.coef, domain=cheby_fit.domain)
-
-    # Chebyshev polynomial for density of water ice
-    rho = Chebyshev(
-        coef=[
-            0.92801793,
-            -0.00842493,
-            -0.00290406,
-            -9.85882725e-05,
-            0.00015617,
-            -1.79696265e-05,
-        ],
-        domain=[-260.0, 0.0],
-    )
-    return rho(t)
+    return _get_density_water_ice(t)
+
+
+def _get_density_water_ice(t: float | np.ndarray) -> float | np.ndarray:
+    """density of water ice without range check"""
+    return _DENSITY_WATER_ICE(t)
+
+
+def get_enthalpy_water(t: float | np.ndarray) -> float | np.ndarray:
+    """enthalpy of water/ice at Temperatur t in °C, element-wise for arrays"""
+    if isinstance(t, np.ndarray):
+        if any_true(150 < t):
+            raise ValueError("t_dry_bulb > 150°C")
+        if any_true(-273.15 > t):
+            raise ValueError("Temperature range: -273.15 °C < T < 0.01 °C")
+        return np.where(
+            0.01 <= t,
+            _get_enthalpy_water_liquid(np.maximum(t, 0.01)),
+            _get_enthalpy_water_ice(np.minimum(t, 0.01)),
+        )
 
+    return _get_enthalpy_water_scalar(t)
 
-def get_enthalpy_water(t: float) -> float:
-    """enthalpy of water/ice at Temperatur t in °C"""
+
+@lru_cache(maxsize=4096)
+def _get_enthalpy_water_scalar(t: float) -> float:
     if 0.01 <= t and 150 >= t:
-        return get_enthalpy_water_liquid(t)
+        return _get_enthalpy_water_liquid(t)
     elif 0.01 > t:
         return get_enthalpy_water_ice(t)
     raise ValueError("t_dry_bulb > 150°C")
 
 
-def get_enthalpy_water_liquid(t: float) -> float:
+def get_enthalpy_water_liquid(t: float | np.ndarray) -> float | np.ndarray:
     """
     [1] C. O. Popiel und J. Wojtkowiak,
     Simple Formulas for Thermophysical Properties of Liquid Water
     for Heat Transfer Calculations (from 0°C to 150°C)“,
     Heat Transfer Engineering, Bd. 19, Nr. 3, S. 87-101, Jan. 1998, doi: 10.1080/01457639808939929.
     """
-    if 0.01 > t or 150 < t:
+    if any_true(0.01 > t) or any_true(150 < t):
         raise ValueError("Temperature range: 0.01 °C < T < 150 °C")
 
+    return _get_enthalpy_water_liquid(t)
+
+
+def _get_enthalpy_water_liquid(t: float | np.ndarray) -> float | np.ndarray:
+    """enthalpy of liquid water without range check"""
     d1 = -2.844699e-2
     d2 = 4.211925
     d3 = -1.017034e-3
@@ -165,10 +240,10 @@ def get_enthalpy_water_liquid(t: float) -> float:
     d5 = -6.756469e-8
     d6 = 1.724481e-10
 
-    return (d1 + d2 * t + d3 * t**2 + d4 * t**3 + d5 * t**4 + d6 * t**5) * 1e3
+    return (d1 + t * (d2 + t * (d3 + t * (d4 + t * (d5 + t * d6))))) * 1e3
 
 
-def get_enthalpy_water_ice(t: float) -> float:
+def get_enthalpy_water_ice(t: float | np.ndarray) -> float | np.ndarray:
     """
     Calculate the specific enthalpy of ice at a given temperature.
 
@@ -178,9 +253,14 @@ def get_enthalpy_water_ice(t: float) -> float:
     Returns:
     float: Specific enthalpy in kJ/kg.
     """
-    if -273.15 > t or 0.01 < t:
+    if any_true(-273.15 > t) or any_true(0.01 < t):
         raise ValueError("Temperature range: -273.15 °C < T < 0.01 °C")
 
+    return _get_enthalpy_water_ice(t)
+
+
+def _get_enthalpy_water_ice(t: float | np.ndarray) -> float | np.ndarray:
+    """enthalpy of water ice without range check"""
     par = [
         -3.33277728e02,
         2.11430597e00,
@@ -188,4 +268,5 @@ def get_enthalpy_water_ice(t: float) -> float:
         6.07648070e-06,
         1.55000954e-08,
     ]
-    return (par[0] + par[1] * t + par[2] * t**2 + par[3] * t**3 + par[4] * t**4) * 1e3
+    p0, p1, p2, p3, p4 = par
+    return (p0 + t * (p1 + t * (p2 + t * (p3 + t * p4)))) * 1e3